@@ -1,92 +1,375 @@
-from time import sleep
+import asyncio
+import bisect
+import threading
+import time
+from collections.abc import Callable, Coroutine, Iterable, Iterator, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import partial
+from operator import attrgetter
+from typing import Any, TypeVar
 
+from jsonrpclib import MultiCall, ProtocolError, ServerProxy, TransportError
+from kiutra_api.api_client import DEVICE_READY, KiutraClient
 from kiutra_api.controller_interfaces import (
     ADRControl,
     CryostatControl,
     HeaterControl,
     MagnetControl,
     SampleControl,
+    SetpointControl,
     TemperatureControl,
 )
 from kiutra_api.device_interfaces import Magnet
 from qcodes.instrument import Instrument
 
+_T = TypeVar("_T")
 
-class Kiutra(Instrument):
-    def __init__(self, name: str, host_ip_address: str) -> None:
-        super().__init__(
-            name, metadata={}, label="kiutra"
-        )  # Calls Instrument.__init__(name)
+# Seconds between two ``stable`` queries while waiting for a ramp to finish.
+# The interval grows by _POLL_BACKOFF up to _POLL_MAX while the reading is far
+# from the setpoint. Once the remaining distance is below _NEAR_SETPOINT times
+# the distance at the start of the wait, the reading is no longer queried and
+# ``stable`` is polled every _POLL_MIN, the controller's own 1 Hz cadence.
+_POLL_MIN = 1.0
+_POLL_MAX = 5.0
+_POLL_BACKOFF = 1.5
+_NEAR_SETPOINT = 0.05
+# Seconds a parameter reading, fetched alone or in a batched snapshot request,
+# is reused by further gets of that parameter and by ramp rate decisions.
+_READING_TTL = 0.1
 
-        self.cryostat_control = CryostatControl(
-            device="cryostat",
-            host=host_ip_address,
-        )
-        self.sample_control = SampleControl(
-            device="sample_loader",
-            host=host_ip_address,
-        )
-        self.temperature_control = TemperatureControl(
-            device="temperature_control",
-            host=host_ip_address,
-        )
-        self.adr_control = ADRControl(
-            device="adr_control",
-            host=host_ip_address,
-        )
-        self.heater_control = HeaterControl(
-            device="sample_heater",
-            host=host_ip_address,
-        )
-        self.magnet_control = MagnetControl(
-            device="sample_magnet",
-            host=host_ip_address,
-        )
-        self.magnet_power_supply_1 = Magnet(
-            device="mps_1",
-            host=host_ip_address,
-        )
-        self.magnet_power_supply_2 = Magnet(
-            device="mps_2",
-            host=host_ip_address,
+# Magnetic field ramp rate in T/min for sample stage temperatures below each
+# threshold in K (Kiutra Operator's Manual p.30).
+_FIELD_TEMP_THRESHOLDS = (1.0, 10.0)
+_FIELD_RATES = (0.1, 0.5)
+# Temperature ramp rate in K/min for temperatures up to each threshold in K.
+_TEMP_THRESHOLDS = (0.3, 0.5, 1.0, 4.0, 20.0)
+_TEMP_RATES = (0.05, 0.10, 0.15, 0.20, 0.25)
+
+
+def _check_ramp_table(thresholds: Sequence[float], rates: Sequence[float]) -> None:
+    if len(thresholds) != len(rates) or list(thresholds) != sorted(thresholds):
+        raise ValueError(
+            "Ramp rate thresholds must be ascending and match the rates one to one."
         )
 
+
+_check_ramp_table(_FIELD_TEMP_THRESHOLDS, _FIELD_RATES)
+_check_ramp_table(_TEMP_THRESHOLDS, _TEMP_RATES)
+
+_FIELD_RAMP_OOR_MSG = (
+    "Magnetic field ramp rate is not defined for temperatures above "
+    f"{_FIELD_TEMP_THRESHOLDS[-1]:g}K."
+)
+_TEMP_RAMP_OOR_MSG = (
+    "Temperature ramp rate is not defined for temperatures above "
+    f"{_TEMP_THRESHOLDS[-1]:g}K."
+)
+
+# (Kiutra attribute, kiutra_api client class, device name on the server) of
+# every controller the instrument talks to.
+_DEVICES: tuple[tuple[str, type[KiutraClient], str], ...] = (
+    ("cryostat_control", CryostatControl, "cryostat"),
+    ("sample_control", SampleControl, "sample_loader"),
+    ("temperature_control", TemperatureControl, "temperature_control"),
+    ("adr_control", ADRControl, "adr_control"),
+    ("heater_control", HeaterControl, "sample_heater"),
+    ("magnet_control", MagnetControl, "sample_magnet"),
+    ("magnet_power_supply_1", Magnet, "mps_1"),
+    ("magnet_power_supply_2", Magnet, "mps_2"),
+)
+
+# Parameter name -> (controller attribute, controller property) for the
+# readings that a snapshot fetches in a single JSON-RPC batch request.
+_BATCHED_READINGS: dict[str, tuple[str, str]] = {
+    "sample_stage_temperature": ("temperature_control", "kelvin"),
+    "sample_magnetic_field": ("magnet_control", "field"),
+    "magnet_power_supply_1_field": ("magnet_power_supply_1", "field"),
+    "magnet_power_supply_2_field": ("magnet_power_supply_2", "field"),
+    "sample_heater_power": ("heater_control", "power"),
+}
+# Parameter name -> getter reading the same property directly from the
+# instrument's controller.
+_READERS: dict[str, Callable[[Any], Any]] = {
+    name: attrgetter(f"{controller}.{prop}")
+    for name, (controller, prop) in _BATCHED_READINGS.items()
+}
+
+
+class _LockedServerProxy(ServerProxy):
+    """ServerProxy that can be shared between threads: requests take turns on
+    its single keep-alive HTTP connection."""
+
+    def __init__(self, uri: str) -> None:
+        super().__init__(uri)
+        self._request_lock = threading.Lock()
+
+    def _run_request(self, request: str, notify: bool = False) -> Any:
+        with self._request_lock:
+            return super()._run_request(request, notify)
+
+
+class _KeepAliveConnection:
+    """The JSON-RPC proxy to the kiutra server, which keeps its HTTP
+    connection open between calls from any thread."""
+
+    def __init__(self, host: str, port: int = 1006) -> None:
+        self.server = _LockedServerProxy(f"http://{host}:{port}")
+
+    def close(self) -> None:
+        self.server("close")()
+
+
+class _SharedConnection:
+    """Mixin for kiutra_api clients, which otherwise open a new connection
+    for every single query."""
+
+    connection: _KeepAliveConnection
+
+    @property
+    def server(self) -> ServerProxy:
+        return self.connection.server
+
+
+# kiutra_api client class -> subclass that uses the shared connection
+_SHARED_CONNECTION_CLASSES: dict[type[KiutraClient], type[KiutraClient]] = {
+    cls: type(cls.__name__, (_SharedConnection, cls), {})
+    for _attribute, cls, _device in _DEVICES
+}
+
+
+def _run_sync(coro: Coroutine[Any, Any, _T]) -> _T:
+    """Run ``coro`` to completion from synchronous code.
+
+    :func:`asyncio.run` refuses to start inside a running event loop (e.g. a
+    Jupyter kernel), in which case the coroutine gets its own loop in a worker
+    thread.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    executor = ThreadPoolExecutor(max_workers=1)
+    try:
+        return executor.submit(asyncio.run, coro).result()
+    finally:
+        executor.shutdown(wait=False)
+
+
+@contextmanager
+def _stopping_on_failure(*controls: SetpointControl) -> Iterator[None]:
+    """Stop ``controls`` if the wait inside the block fails, is cancelled or is
+    interrupted, so that no ramp is left running unattended."""
+    try:
+        yield
+    except BaseException:
+        for control in controls:
+            control.stop()
+        raise
+
+
+async def _wait_together(*waits: Coroutine[Any, Any, None]) -> None:
+    """Run ``waits`` concurrently. If one fails, the others are cancelled and
+    its error is raised as is, like a single wait would, instead of wrapped in
+    an ExceptionGroup."""
+    try:
+        async with asyncio.TaskGroup() as group:
+            for wait in waits:
+                group.create_task(wait)
+    except BaseExceptionGroup as errors:
+        if len(errors.exceptions) == 1:
+            raise errors.exceptions[0] from None
+        raise
+
+
+class Kiutra(Instrument):
+    cryostat_control: CryostatControl
+    sample_control: SampleControl
+    temperature_control: TemperatureControl
+    adr_control: ADRControl
+    heater_control: HeaterControl
+    magnet_control: MagnetControl
+    magnet_power_supply_1: Magnet
+    magnet_power_supply_2: Magnet
+
+    def __init__(
+        self,
+        name: str,
+        host_ip_address: str,
+        field_tolerance: float | None = None,
+        temp_tolerance: float | None = None,
+        **kwargs: Any,
+    ) -> None:
+        """
+        Args:
+            name: Name of the instrument.
+            host_ip_address: IP address of the kiutra control computer.
+            field_tolerance: Distance in T from a field setpoint within which
+                a stable magnet is not ramped again. By default every setpoint
+                is ramped to; choose a tolerance below the smallest field step
+                of a sweep, or such steps are skipped.
+            temp_tolerance: Distance in K from a temperature setpoint within
+                which a stable sample stage is not stabilized again. By default
+                every setpoint is stabilized at.
+            **kwargs: Forwarded to the Instrument base class.
+        """
+        kwargs.setdefault("label", "kiutra")
+        super().__init__(name, **kwargs)
+
+        self.host_ip_address = host_ip_address
+        self._field_tolerance = field_tolerance
+        self._temp_tolerance = temp_tolerance
+        self._idn: dict[str, str | None] = {
+            "model": "Kiutra",
+            "Host": host_ip_address,
+        }
+
+        # parameter name -> (monotonic timestamp, value) of the last reading
+        self._readings: dict[str, tuple[float, Any]] = {}
+        self._batching_supported = True
+        self._connection = _KeepAliveConnection(host_ip_address)
+        # set by abort(); the waits it cancels, with the loops they run in
+        self._abort = threading.Event()
+        self._waits: set[tuple[asyncio.AbstractEventLoop, asyncio.Task[Any]]] = set()
+        self._waits_lock = threading.Lock()
+
+        for attribute, cls, device in _DEVICES:
+            setattr(self, attribute, self._connect(cls, device))
+
         self.add_parameter(
             name="sample_stage_temperature",
             unit="K",
             label="sample_stage_temperature",
-            get_cmd=lambda: self.TemperatureControl.kelvin,
+            get_cmd=partial(self._get_reading, "sample_stage_temperature"),
         )
         self.add_parameter(
             name="sample_magnetic_field",
             unit="T",
             label="sample_magnetic_field",
-            get_cmd=lambda: self.MagnetControl.field,
-            set_cmd=lambda field: self.stabilize_at_magnetic_field(
-                setpoint_magnetic_field=field
-            ),
+            get_cmd=partial(self._get_reading, "sample_magnetic_field"),
+            set_cmd=self.stabilize_at_magnetic_field,
         )
         self.add_parameter(
             name="magnet_power_supply_1_field",
             unit="T",
             label="magnet_power_supply_1_field",
-            get_cmd=lambda: self.magnet_power_supply_1.field,
+            get_cmd=partial(self._get_reading, "magnet_power_supply_1_field"),
         )
         self.add_parameter(
             name="magnet_power_supply_2_field",
             unit="T",
             label="magnet_power_supply_2_field",
-            get_cmd=lambda: self.magnet_power_supply_2.field,
+            get_cmd=partial(self._get_reading, "magnet_power_supply_2_field"),
         )
         self.add_parameter(
             name="sample_heater_power",
             unit="W",
             label="sample_heater_power",
-            get_cmd=lambda: self.HeaterControl.power,
+            get_cmd=partial(self._get_reading, "sample_heater_power"),
+        )
+
+    def _connect(self, cls: type[KiutraClient], device: str) -> KiutraClient:
+        controller = _SHARED_CONNECTION_CLASSES[cls](
+            device=device, host=self.host_ip_address
         )
+        controller.connection = self._connection
+        return controller
+
+    def close(self) -> None:
+        self._connection.close()
+        super().close()
 
     def get_idn(self) -> dict[str, str | None]:
-        return {"model": "Kiutra", "Host": self.host_ip_address}
+        return self._idn
+
+    def snapshot_base(
+        self,
+        update: bool | None = False,
+        params_to_skip_update: Sequence[str] | None = None,
+    ) -> dict[Any, Any]:
+        self._invalidate_readings()
+        if update:
+            skipped = params_to_skip_update or ()
+            self._batched_snapshot(
+                name for name in _BATCHED_READINGS if name not in skipped
+            )
+        return super().snapshot_base(
+            update=update, params_to_skip_update=params_to_skip_update
+        )
+
+    def _batched_snapshot(self, names: Iterable[str]) -> None:
+        """Fetch the readings of the parameters ``names`` with one JSON-RPC
+        batch request into the cache used by their get commands.
+
+        Readings the server fails to deliver are simply left out, so those
+        parameters fall back to querying their controller individually. A
+        server that rejects the batch as a whole is not sent any more batches.
+        """
+        names = list(names)
+        if not self._batching_supported or not names:
+            return
+        batch = MultiCall(self._connection.server)
+        for name in names:
+            controller, prop = _BATCHED_READINGS[name]
+            batch.read(getattr(self, controller).handle(prop))
+        try:
+            responses = batch()
+        except (TransportError, OSError):
+            # HTTP or network trouble, not a verdict on batching
+            self.log.debug("Batched snapshot request failed.", exc_info=True)
+            return
+        except ProtocolError as error:
+            self._disable_batching(error)
+            return
+        if not isinstance(responses.results, list):
+            # a single error object answering the whole batch
+            self._disable_batching(responses.results)
+            return
+
+        timestamp = time.monotonic()
+        for index, name in enumerate(names):
+            try:
+                response = responses[index]
+            except (
+                ProtocolError,
+                LookupError,
+                TypeError,
+                ValueError,
+                NotImplementedError,
+            ):
+                continue
+            if (
+                isinstance(response, dict)
+                and response.get("MessageCode") == DEVICE_READY
+            ):
+                self._readings[name] = (timestamp, response["Message"])
+
+    def _disable_batching(self, rejection: object) -> None:
+        """Stop sending batch requests to a server that answered one with the
+        exception or error response ``rejection``."""
+        message = (
+            "Kiutra server rejected a batch request, snapshots will query "
+            "each parameter individually."
+        )
+        if isinstance(rejection, BaseException):
+            self.log.warning(message, exc_info=rejection)
+        else:
+            self.log.warning("%s Response: %r", message, rejection)
+        self._batching_supported = False
+
+    def _get_reading(self, name: str) -> Any:
+        """Get command of the parameter ``name``. Reuses a reading younger
+        than ``_READING_TTL`` so that e.g. a snapshot or a single ramp rate
+        decision queries it only once."""
+        cached = self._readings.get(name)
+        if cached is not None and time.monotonic() - cached[0] < _READING_TTL:
+            return cached[1]
+        value = _READERS[name](self)
+        self._readings[name] = (time.monotonic(), value)
+        return value
+
+    def _invalidate_readings(self) -> None:
+        self._readings.clear()
 
     def start_magnetic_field_sweep(
         self,
@@ -96,7 +379,7 @@ class Kiutra(Instrument):
         if magnetic_field_ramp_rate is None:
             magnetic_field_ramp_rate = self.get_magnetic_field_ramp_rate()
 
-        self.MagnetControl.start(
+        self.magnet_control.start(
             setpoint=setpoint_magnetic_field, ramp=magnetic_field_ramp_rate
         )
         print(
@@ -107,44 +390,277 @@ class Kiutra(Instrument):
         """We choose a magnetic field ramp rate based on the reccommedantion from Kiutra Operator's Manual p.30.
         Ramp rate is in Tesla/minute."""
 
-        if self.sample_stage_temperature() < 1:
-            return 0.1
-        elif self.sample_stage_temperature() < 10:
-            return 0.5
-        else:
-            raise ValueError(
-                "Magnetic field ramp rate is not defined for temperatures above 10K."
-            )
+        index = bisect.bisect_right(
+            _FIELD_TEMP_THRESHOLDS, self.sample_stage_temperature()
+        )
+        if index == len(_FIELD_TEMP_THRESHOLDS):
+            raise ValueError(_FIELD_RAMP_OOR_MSG)
+        return _FIELD_RATES[index]
 
     def stabilize_at_magnetic_field(
         self,
         setpoint_magnetic_field: float,
         magnetic_field_ramp_rate: float | None = None,
     ) -> None:
+        self._run(
+            self.stabilize_at_magnetic_field_async(
+                setpoint_magnetic_field=setpoint_magnetic_field,
+                magnetic_field_ramp_rate=magnetic_field_ramp_rate,
+            )
+        )
+
+    async def stabilize_at_magnetic_field_async(
+        self,
+        setpoint_magnetic_field: float,
+        magnetic_field_ramp_rate: float | None = None,
+    ) -> None:
+        """Coroutine version of :meth:`stabilize_at_magnetic_field`. Other tasks
+        keep running while the field ramps; cancelling it stops the ramp."""
+        self._abort.clear()
+        if self._magnet_at(setpoint_magnetic_field):
+            return
         self.start_magnetic_field_sweep(
             setpoint_magnetic_field=setpoint_magnetic_field,
             magnetic_field_ramp_rate=magnetic_field_ramp_rate,
         )
-        while not self.MagnetControl.stable:
-            sleep(1)
+        self._check_aborted(self.magnet_control)
+        await self._abortable_wait(
+            self._await_magnet_stable(setpoint_magnetic_field), self.magnet_control
+        )
 
     def stabilize_at_temperature(
         self,
         setpoint_temperature: float,
         user_temp_ramp_rate: float | None = None,
     ) -> None:
-        temp_now = self.sample_stage_temperature()
+        self._run(
+            self.stabilize_at_temperature_async(
+                setpoint_temperature=setpoint_temperature,
+                user_temp_ramp_rate=user_temp_ramp_rate,
+            )
+        )
+
+    async def stabilize_at_temperature_async(
+        self,
+        setpoint_temperature: float,
+        user_temp_ramp_rate: float | None = None,
+    ) -> None:
+        """Coroutine version of :meth:`stabilize_at_temperature`. Other tasks
+        keep running while the temperature settles; cancelling it stops the
+        temperature control."""
+        self._abort.clear()
+        if self._temperature_at(setpoint_temperature):
+            return
+        self.start_temperature_stabilization(
+            setpoint_temperature=setpoint_temperature,
+            user_temp_ramp_rate=user_temp_ramp_rate,
+        )
+        self._check_aborted(self.temperature_control)
+        await self._abortable_wait(
+            self._await_temperature_stable(setpoint_temperature),
+            self.temperature_control,
+        )
+
+    def stabilize_at(
+        self,
+        setpoint_magnetic_field: float,
+        setpoint_temperature: float,
+        magnetic_field_ramp_rate: float | None = None,
+        user_temp_ramp_rate: float | None = None,
+    ) -> None:
+        self._run(
+            self.stabilize_at_async(
+                setpoint_magnetic_field=setpoint_magnetic_field,
+                setpoint_temperature=setpoint_temperature,
+                magnetic_field_ramp_rate=magnetic_field_ramp_rate,
+                user_temp_ramp_rate=user_temp_ramp_rate,
+            )
+        )
+
+    async def stabilize_at_async(
+        self,
+        setpoint_magnetic_field: float,
+        setpoint_temperature: float,
+        magnetic_field_ramp_rate: float | None = None,
+        user_temp_ramp_rate: float | None = None,
+    ) -> None:
+        """Ramp the magnetic field and the temperature at the same time and
+        wait until both are stable, which takes as long as the slower of the
+        two instead of their sum. Both ramp rates are checked before either
+        ramp starts. If either start or wait fails or is cancelled, both
+        controls are stopped."""
+        self._abort.clear()
+        ramp_field = not self._magnet_at(setpoint_magnetic_field)
+        ramp_temperature = not self._temperature_at(setpoint_temperature)
+        if ramp_field and magnetic_field_ramp_rate is None:
+            magnetic_field_ramp_rate = self.get_magnetic_field_ramp_rate()
+        if ramp_temperature:
+            temp_ramp_rate = self.check_temp_ramp_rate(
+                user_temp_ramp_rate, setpoint_temperature
+            )
+        if ramp_field:
+            self.start_magnetic_field_sweep(
+                setpoint_magnetic_field=setpoint_magnetic_field,
+                magnetic_field_ramp_rate=magnetic_field_ramp_rate,
+            )
+            self._check_aborted(self.magnet_control)
+        if ramp_temperature:
+            try:
+                self._start_temperature_control(setpoint_temperature, temp_ramp_rate)
+            except BaseException:
+                if ramp_field:
+                    self.magnet_control.stop()
+                raise
+            self._check_aborted(self.magnet_control, self.temperature_control)
+        waits = []
+        started: list[SetpointControl] = []
+        if ramp_field:
+            waits.append(self._await_magnet_stable(setpoint_magnetic_field))
+            started.append(self.magnet_control)
+        if ramp_temperature:
+            waits.append(self._await_temperature_stable(setpoint_temperature))
+            started.append(self.temperature_control)
+        await self._abortable_wait(_wait_together(*waits), *started)
+
+    def abort(self) -> None:
+        """Stop the magnet and the temperature control. Safe to call from any
+        thread: an ongoing stabilization wait is cancelled right away, and the
+        synchronous ``stabilize_at*`` methods raise KeyboardInterrupt. Both
+        controls get a stop command even if the first one fails; the first
+        failure is raised afterwards."""
+        self._abort.set()
+        self._cancel_waits()
+        failure: Exception | None = None
+        for control in (self.magnet_control, self.temperature_control):
+            try:
+                control.stop()
+            except Exception as error:
+                self.log.exception("Could not stop %s.", type(control).__name__)
+                failure = failure or error
+        if failure is not None:
+            raise failure
+
+    def _cancel_waits(self) -> None:
+        with self._waits_lock:
+            waits = list(self._waits)
+        for loop, task in waits:
+            loop.call_soon_threadsafe(task.cancel)
+
+    def _check_aborted(self, *started: Any) -> None:
+        """Raise CancelledError if :meth:`abort` was called while ramps were
+        being started. Those are stopped again, since their start command may
+        have reached the server after abort's stop."""
+        if self._abort.is_set():
+            for control in started:
+                control.stop()
+            raise asyncio.CancelledError
+
+    async def _abortable_wait(
+        self, wait: Coroutine[Any, Any, None], *started: SetpointControl
+    ) -> None:
+        """Run ``wait`` in a task of its own that :meth:`abort` can cancel,
+        leaving the caller's task alone. The ``started`` controls are stopped
+        if the wait fails or is cancelled, even before it got to run."""
+        task = asyncio.ensure_future(wait)
+        entry = (asyncio.get_running_loop(), task)
+        with self._waits_lock:
+            self._waits.add(entry)
+        try:
+            with _stopping_on_failure(*started):
+                if self._abort.is_set():
+                    # aborted after the start commands, before abort could see us
+                    task.cancel()
+                await task
+        finally:
+            with self._waits_lock:
+                self._waits.discard(entry)
+
+    def _run(self, coro: Coroutine[Any, Any, _T]) -> _T:
+        try:
+            return _run_sync(coro)
+        except asyncio.CancelledError:
+            if self._abort.is_set():
+                raise KeyboardInterrupt("Kiutra ramp aborted") from None
+            raise
+        except KeyboardInterrupt:
+            # the wait may still be running in a worker thread of _run_sync
+            self._cancel_waits()
+            raise
+
+    def start_temperature_stabilization(
+        self,
+        setpoint_temperature: float,
+        user_temp_ramp_rate: float | None = None,
+    ) -> None:
         ramp_rate = self.check_temp_ramp_rate(user_temp_ramp_rate, setpoint_temperature)
+        self._start_temperature_control(setpoint_temperature, ramp_rate)
 
+    def _start_temperature_control(
+        self, setpoint_temperature: float, ramp_rate: float
+    ) -> None:
+        temp_now = self.sample_stage_temperature()
         print(f"Stabilizing at {setpoint_temperature} K at {ramp_rate} K/min")
-        self.TemperatureControl.start_proposed_mode(
+        self.temperature_control.start_proposed_mode(
             setpoint=setpoint_temperature,
             ramp=ramp_rate,
             mode="stabilize",
             start_temperature=temp_now,
         )
-        while not self.TemperatureControl.stable:
-            sleep(1)
+
+    def _magnet_at(self, setpoint_magnetic_field: float) -> bool:
+        """Whether the magnet already rests at ``setpoint_magnetic_field``."""
+        if not self._field_tolerance:
+            return False
+        field = self.sample_magnetic_field()
+        return (
+            abs(field - setpoint_magnetic_field) < self._field_tolerance
+            and self.magnet_control.stable
+        )
+
+    def _temperature_at(self, setpoint_temperature: float) -> bool:
+        """Whether the sample stage is already stable at ``setpoint_temperature``."""
+        if not self._temp_tolerance:
+            return False
+        temp_now = self.sample_stage_temperature()
+        return (
+            abs(temp_now - setpoint_temperature) < self._temp_tolerance
+            and self.temperature_control.stable
+        )
+
+    async def _await_magnet_stable(self, setpoint_magnetic_field: float) -> None:
+        await self._await_stable(
+            self.magnet_control, "field", setpoint_magnetic_field
+        )
+
+    async def _await_temperature_stable(self, setpoint_temperature: float) -> None:
+        await self._await_stable(
+            self.temperature_control, "kelvin", setpoint_temperature
+        )
+
+    async def _await_stable(
+        self, control: SetpointControl, reading: str, setpoint: float
+    ) -> None:
+        """Wait until ``control`` is stable, polling rarely while its
+        ``reading`` property is still far from ``setpoint``."""
+        try:
+            start_distance = abs(setpoint - getattr(control, reading))
+            near_distance = _NEAR_SETPOINT * start_distance
+            delay = _POLL_MIN
+            backing_off = True
+            while not control.stable:
+                await asyncio.sleep(delay)
+                if not backing_off:
+                    continue
+                distance = abs(setpoint - getattr(control, reading))
+                if distance <= near_distance:
+                    # settling: from now on each poll is a single query
+                    backing_off = False
+                    delay = _POLL_MIN
+                else:
+                    delay = min(_POLL_MAX, delay * _POLL_BACKOFF)
+        finally:
+            # the ramp has changed what the cached readings were taken from
+            self._invalidate_readings()
 
     def ramp_temperature(self, start: float, stop: float) -> None:
         """Before sending other commands to the Kiutra, it is good practice
@@ -155,13 +671,13 @@ class Kiutra(Instrument):
 
         rate = self.get_temp_ramp_rate(start, stop)
         print(f"Ramping to {stop} K at {rate} K/min")
-        self.TemperatureControl.start_proposed_mode(
+        self.temperature_control.start_proposed_mode(
             setpoint=stop, ramp=rate, mode="ramp", start_temperature=start
         )
 
     def check_temp_ramp_rate(
         self, user_set_rate: float | None, setpoint_temperature: float
-    ) -> float | None:
+    ) -> float:
         temp_now = self.sample_stage_temperature()
         default_ramp_rate = self.get_temp_ramp_rate(temp_now, setpoint_temperature)
 
@@ -176,28 +692,14 @@ class Kiutra(Instrument):
             return default_ramp_rate
 
     def get_temp_ramp_rate(self, temp_1: float, temp_2: float) -> float:
-        min_temp = min(temp_1, temp_2)
-
-        if min_temp <= 0.3:
-            ramp_rate = 0.05
-        elif min_temp <= 0.5:
-            ramp_rate = 0.10
-        elif min_temp <= 1.0:
-            ramp_rate = 0.15
-        elif min_temp <= 4.0:
-            ramp_rate = 0.20
-        elif min_temp <= 20.0:
-            ramp_rate = 0.25
-        else:
-            raise ValueError(
-                "Temperature ramp rate is not defined for temperatures above 20K."
-            )
-
-        return ramp_rate
+        index = bisect.bisect_left(_TEMP_THRESHOLDS, min(temp_1, temp_2))
+        if index == len(_TEMP_THRESHOLDS):
+            raise ValueError(_TEMP_RAMP_OOR_MSG)
+        return _TEMP_RATES[index]
 
     def check_temp_control(self) ->None:
 
-        if self.TemperatureControl.stable:
+        if self.temperature_control.stable:
             pass
         else:
             raise RuntimeError("Temperature control is not stable. Either abort command or reset temp control from the GUI.")
\ No newline at end of file
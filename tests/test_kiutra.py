@@ -0,0 +1,528 @@
+import asyncio
+import threading
+import time
+from unittest.mock import PropertyMock
+
+import pytest
+
+pytest.importorskip("kiutra_api")
+
+from jsonrpclib import ProtocolError, TransportError  # noqa: E402
+from jsonrpclib.jsonrpc import MultiCallIterator  # noqa: E402
+
+from qcodes_contrib_drivers.drivers.Kiutra import Kiutra as kiutra_module  # noqa: E402
+from qcodes_contrib_drivers.drivers.Kiutra.Kiutra import Kiutra  # noqa: E402
+
+
+@pytest.fixture(scope="function")
+def driver(monkeypatch, mocker):
+    monkeypatch.setattr(kiutra_module, "_POLL_MIN", 0)
+    monkeypatch.setattr(kiutra_module, "_POLL_MAX", 0)
+    kiutra = Kiutra("kiutra_test", "127.0.0.1")
+    kiutra.magnet_control = mocker.MagicMock()
+    kiutra.magnet_control.field = 0.0
+    kiutra.temperature_control = mocker.MagicMock()
+    kiutra.heater_control = mocker.MagicMock()
+    kiutra.magnet_power_supply_1 = mocker.MagicMock()
+    kiutra.magnet_power_supply_2 = mocker.MagicMock()
+    yield kiutra
+    kiutra.close()
+
+
+def _set_stable(control, *values):
+    stable = PropertyMock(side_effect=values)
+    type(control).stable = stable
+    return stable
+
+
+def test_stabilize_at_magnetic_field_polls_until_stable(driver):
+    stable = _set_stable(driver.magnet_control, False, False, True)
+
+    driver.stabilize_at_magnetic_field(1.0, magnetic_field_ramp_rate=0.1)
+
+    driver.magnet_control.start.assert_called_once_with(setpoint=1.0, ramp=0.1)
+    assert stable.call_count == 3
+
+
+def test_stabilize_at_temperature_polls_until_stable(driver):
+    driver.temperature_control.kelvin = 0.2
+    stable = _set_stable(driver.temperature_control, False, True)
+
+    driver.stabilize_at_temperature(0.25)
+
+    driver.temperature_control.start_proposed_mode.assert_called_once_with(
+        setpoint=0.25, ramp=0.05, mode="stabilize", start_temperature=0.2
+    )
+    assert stable.call_count == 2
+
+
+def test_sync_wrapper_inside_running_loop(driver):
+    _set_stable(driver.magnet_control, False, True)
+
+    async def main():
+        driver.stabilize_at_magnetic_field(1.0, magnetic_field_ramp_rate=0.1)
+
+    asyncio.run(main())
+
+    driver.magnet_control.start.assert_called_once()
+
+
+def test_cancelling_stops_ramp(driver, monkeypatch):
+    monkeypatch.setattr(kiutra_module, "_POLL_MIN", 10)
+    _set_stable(driver.magnet_control, *[False] * 10)
+
+    async def main():
+        task = asyncio.create_task(
+            driver.stabilize_at_magnetic_field_async(
+                1.0, magnetic_field_ramp_rate=0.1
+            )
+        )
+        await asyncio.sleep(0)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(main())
+
+    driver.magnet_control.stop.assert_called_once()
+
+
+def test_ramp_rate_decision_reads_temperature_once(driver):
+    kelvin = PropertyMock(return_value=0.2)
+    type(driver.temperature_control).kelvin = kelvin
+
+    driver.check_temp_ramp_rate(None, 0.25)
+    driver.get_magnetic_field_ramp_rate()
+
+    assert driver.sample_stage_temperature() == 0.2
+    assert kelvin.call_count == 1
+
+
+class _FakeBatch:
+    def __init__(self, server):
+        self.keys = []
+
+    def read(self, key):
+        self.keys.append(key)
+
+    def __call__(self):
+        return MultiCallIterator(
+            [
+                {"jsonrpc": "2.0", "id": index, "result": self.result(index)}
+                for index, _ in enumerate(self.keys)
+            ]
+        )
+
+    def result(self, index):
+        return {"MessageCode": 0, "Message": float(index)}
+
+
+def test_snapshot_reads_parameters_in_one_batch(driver, monkeypatch):
+    batches = []
+
+    def make_batch(server):
+        batches.append(_FakeBatch(server))
+        return batches[-1]
+
+    monkeypatch.setattr(kiutra_module, "MultiCall", make_batch)
+    kelvin = PropertyMock()
+    type(driver.temperature_control).kelvin = kelvin
+
+    snapshot = driver.snapshot(update=True)
+
+    assert len(batches) == 1
+    assert len(batches[0].keys) == 5
+    assert kelvin.call_count == 0
+    parameters = snapshot["parameters"]
+    assert parameters["sample_stage_temperature"]["value"] == 0.0
+    assert parameters["sample_heater_power"]["value"] == 4.0
+
+    driver.sample_stage_temperature()
+    assert kelvin.call_count == 0
+
+    monkeypatch.setattr(kiutra_module, "_READING_TTL", 0)
+    driver.sample_stage_temperature()
+    assert kelvin.call_count == 1
+
+
+def test_snapshot_falls_back_when_batch_is_rejected(driver, monkeypatch, caplog):
+    batches = []
+
+    class RejectingBatch(_FakeBatch):
+        def __call__(self):
+            batches.append(self)
+            return MultiCallIterator(
+                {
+                    "jsonrpc": "2.0",
+                    "id": None,
+                    "error": {"code": -32600, "message": "Invalid Request"},
+                }
+            )
+
+    monkeypatch.setattr(kiutra_module, "MultiCall", RejectingBatch)
+    type(driver.temperature_control).kelvin = PropertyMock(return_value=3.0)
+
+    snapshot = driver.snapshot(update=True)
+    driver.snapshot(update=True)
+
+    assert snapshot["parameters"]["sample_stage_temperature"]["value"] == 3.0
+    assert not driver._batching_supported
+    assert len(batches) == 1
+    assert "Invalid Request" in caplog.text
+    assert "NoneType" not in caplog.text
+
+
+def test_snapshot_logs_the_protocol_error_rejecting_a_batch(
+    driver, monkeypatch, caplog
+):
+    class RaisingBatch(_FakeBatch):
+        def __call__(self):
+            raise ProtocolError("Method not found")
+
+    monkeypatch.setattr(kiutra_module, "MultiCall", RaisingBatch)
+    type(driver.temperature_control).kelvin = PropertyMock(return_value=3.0)
+
+    driver.snapshot(update=True)
+
+    assert not driver._batching_supported
+    assert "ProtocolError: Method not found" in caplog.text
+
+
+def test_snapshot_keeps_batching_after_transport_error(driver, monkeypatch):
+    class FailingBatch(_FakeBatch):
+        def __call__(self):
+            raise TransportError("127.0.0.1/", 503, "Service Unavailable", None)
+
+    monkeypatch.setattr(kiutra_module, "MultiCall", FailingBatch)
+    type(driver.temperature_control).kelvin = PropertyMock(return_value=3.0)
+
+    snapshot = driver.snapshot(update=True)
+
+    assert snapshot["parameters"]["sample_stage_temperature"]["value"] == 3.0
+    assert driver._batching_supported
+
+
+def test_snapshot_skips_malformed_batch_items(driver, monkeypatch):
+    class MalformedBatch(_FakeBatch):
+        def __call__(self):
+            results = super().__call__().results
+            results[0] = {"jsonrpc": "2.0", "id": 0}
+            return MultiCallIterator(results)
+
+    monkeypatch.setattr(kiutra_module, "MultiCall", MalformedBatch)
+    type(driver.temperature_control).kelvin = PropertyMock(return_value=3.0)
+
+    snapshot = driver.snapshot(update=True)
+
+    parameters = snapshot["parameters"]
+    assert parameters["sample_stage_temperature"]["value"] == 3.0
+    assert parameters["sample_heater_power"]["value"] == 4.0
+    assert driver._batching_supported
+
+
+def test_controllers_share_one_connection(driver):
+    proxy = driver.cryostat_control.server
+
+    assert driver.sample_control.server is proxy
+    assert driver.adr_control.server is proxy
+    assert driver.cryostat_control.server is proxy
+
+
+def test_sync_calls_inside_running_loop_reuse_the_connection(driver):
+    async def read_proxy():
+        return driver.sample_control.server
+
+    async def main():
+        return {id(kiutra_module._run_sync(read_proxy())) for _ in range(5)}
+
+    proxies = asyncio.run(main())
+
+    assert proxies == {id(driver.cryostat_control.server)}
+
+
+def test_init_forwards_instrument_kwargs():
+    kiutra = Kiutra("kiutra_kwargs", "127.0.0.1", metadata={"fridge": "A"})
+    try:
+        assert kiutra.metadata == {"fridge": "A"}
+        assert kiutra.label == "kiutra"
+    finally:
+        kiutra.close()
+
+
+@pytest.mark.parametrize(
+    "temperature, rate",
+    [(0.1, 0.05), (0.3, 0.05), (0.31, 0.10), (1.0, 0.15), (4.0, 0.20), (20.0, 0.25)],
+)
+def test_get_temp_ramp_rate(driver, temperature, rate):
+    assert driver.get_temp_ramp_rate(temperature, 25.0) == rate
+    assert driver.get_temp_ramp_rate(25.0, temperature) == rate
+
+
+def test_get_temp_ramp_rate_above_range(driver):
+    with pytest.raises(ValueError, match="above 20K"):
+        driver.get_temp_ramp_rate(20.1, 25.0)
+
+
+@pytest.mark.parametrize(
+    "temperature, rate", [(0.5, 0.1), (0.999, 0.1), (1.0, 0.5), (9.9, 0.5)]
+)
+def test_get_magnetic_field_ramp_rate(driver, temperature, rate):
+    driver.temperature_control.kelvin = temperature
+    assert driver.get_magnetic_field_ramp_rate() == rate
+
+
+def test_get_magnetic_field_ramp_rate_above_range(driver):
+    driver.temperature_control.kelvin = 10.0
+    with pytest.raises(ValueError, match="above 10K"):
+        driver.get_magnetic_field_ramp_rate()
+
+
+def test_poll_interval_backs_off_until_near_setpoint(driver, monkeypatch):
+    monkeypatch.setattr(kiutra_module, "_POLL_MIN", 1.0)
+    monkeypatch.setattr(kiutra_module, "_POLL_MAX", 5.0)
+    delays = []
+
+    async def fake_sleep(delay):
+        delays.append(delay)
+
+    monkeypatch.setattr(kiutra_module.asyncio, "sleep", fake_sleep)
+    field = PropertyMock(side_effect=[0.0, 0.1, 0.2, 0.5, 0.8, 0.99])
+    type(driver.magnet_control).field = field
+    stable = _set_stable(driver.magnet_control, *[False] * 10, True)
+
+    driver.stabilize_at_magnetic_field(1.0, magnetic_field_ramp_rate=0.1)
+
+    assert delays == pytest.approx(
+        [1.0, 1.5, 2.25, 3.375, 5.0, 1.0, 1.0, 1.0, 1.0, 1.0]
+    )
+    # the settle phase polls only `stable`, once per second
+    assert stable.call_count == 11
+    assert field.call_count == 6
+
+
+def test_stabilize_at_waits_for_field_and_temperature_together(driver):
+    polls = []
+
+    def stable(name, values):
+        values = iter(values)
+
+        def poll():
+            polls.append(name)
+            return next(values)
+
+        return PropertyMock(side_effect=poll)
+
+    driver.temperature_control.kelvin = 0.2
+    type(driver.magnet_control).stable = stable("field", [False, False, True])
+    type(driver.temperature_control).stable = stable("temperature", [False, True])
+
+    driver.stabilize_at(1.0, 0.25, magnetic_field_ramp_rate=0.1)
+
+    driver.magnet_control.start.assert_called_once_with(setpoint=1.0, ramp=0.1)
+    driver.temperature_control.start_proposed_mode.assert_called_once()
+    assert polls == ["field", "temperature", "field", "temperature", "field"]
+
+
+def test_stabilize_at_checks_temperature_rate_before_ramping_field(driver):
+    driver.temperature_control.kelvin = 0.2
+
+    with pytest.raises(ValueError, match="exceeds"):
+        driver.stabilize_at(
+            1.0, 0.25, magnetic_field_ramp_rate=0.1, user_temp_ramp_rate=1.0
+        )
+
+    driver.magnet_control.start.assert_not_called()
+    driver.temperature_control.start_proposed_mode.assert_not_called()
+
+
+def test_stabilize_at_stops_field_if_temperature_start_fails(driver):
+    driver.temperature_control.kelvin = 0.2
+    driver.temperature_control.start_proposed_mode.side_effect = ConnectionError
+
+    with pytest.raises(ConnectionError):
+        driver.stabilize_at(1.0, 0.25, magnetic_field_ramp_rate=0.1)
+
+    driver.magnet_control.start.assert_called_once()
+    driver.magnet_control.stop.assert_called_once()
+
+
+def test_stabilize_at_stops_both_ramps_when_a_wait_fails(driver):
+    driver.temperature_control.kelvin = 0.2
+    _set_stable(driver.magnet_control, False, ConnectionError("lost"))
+    type(driver.temperature_control).stable = PropertyMock(return_value=False)
+
+    with pytest.raises(ConnectionError, match="lost"):
+        driver.stabilize_at(1.0, 0.25, magnetic_field_ramp_rate=0.1)
+
+    driver.magnet_control.stop.assert_called_once()
+    driver.temperature_control.stop.assert_called_once()
+
+
+def test_get_idn(driver):
+    assert driver.get_idn() == {"model": "Kiutra", "Host": "127.0.0.1"}
+    assert driver.IDN() == driver.get_idn()
+
+
+def test_setting_sample_magnetic_field_stabilizes(driver):
+    driver.temperature_control.kelvin = 0.5
+    _set_stable(driver.magnet_control, True)
+
+    driver.sample_magnetic_field(2.0)
+
+    driver.magnet_control.start.assert_called_once_with(setpoint=2.0, ramp=0.1)
+
+
+def test_readings_are_cached_until_a_ramp_finishes(driver):
+    driver.magnet_control.field = 0.5
+    _set_stable(driver.magnet_control, True)
+    kelvin = PropertyMock(return_value=0.2)
+    type(driver.temperature_control).kelvin = kelvin
+
+    driver.sample_stage_temperature()
+    driver.sample_stage_temperature()
+    assert kelvin.call_count == 1
+
+    driver.stabilize_at_magnetic_field(1.0)
+    kelvin.reset_mock()
+    driver.sample_stage_temperature()
+    assert kelvin.call_count == 1
+
+
+def test_check_ramp_table_rejects_inconsistent_tables():
+    kiutra_module._check_ramp_table((0.3, 1.0), (0.05, 0.1))
+    with pytest.raises(ValueError):
+        kiutra_module._check_ramp_table((1.0, 0.3), (0.05, 0.1))
+    with pytest.raises(ValueError):
+        kiutra_module._check_ramp_table((0.3, 1.0), (0.05,))
+
+
+def test_abort_from_another_thread_ends_wait(driver, monkeypatch):
+    monkeypatch.setattr(kiutra_module, "_POLL_MIN", 30)
+    type(driver.magnet_control).stable = PropertyMock(return_value=False)
+    timer = threading.Timer(0.1, driver.abort)
+
+    start = time.monotonic()
+    timer.start()
+    with pytest.raises(KeyboardInterrupt, match="aborted"):
+        driver.stabilize_at_magnetic_field(1.0, magnetic_field_ramp_rate=0.1)
+
+    assert time.monotonic() - start < 5
+    driver.magnet_control.stop.assert_called()
+    driver.temperature_control.stop.assert_called()
+
+
+def test_abort_cancels_concurrent_waits(driver, monkeypatch):
+    monkeypatch.setattr(kiutra_module, "_POLL_MIN", 30)
+    driver.temperature_control.kelvin = 0.2
+    type(driver.magnet_control).stable = PropertyMock(return_value=False)
+    type(driver.temperature_control).stable = PropertyMock(return_value=False)
+    timer = threading.Timer(0.1, driver.abort)
+
+    timer.start()
+    with pytest.raises(KeyboardInterrupt):
+        driver.stabilize_at(1.0, 0.25, magnetic_field_ramp_rate=0.1)
+
+
+def test_abort_during_start_command_ends_wait(driver):
+    driver.magnet_control.start.side_effect = lambda **kwargs: driver.abort()
+    _set_stable(driver.magnet_control, False)
+
+    with pytest.raises(KeyboardInterrupt, match="aborted"):
+        driver.stabilize_at_magnetic_field(1.0, magnetic_field_ramp_rate=0.1)
+
+    assert driver.magnet_control.stop.call_count == 2
+
+
+def test_abort_during_field_start_skips_temperature_start(driver):
+    driver.temperature_control.kelvin = 0.2
+    driver.magnet_control.start.side_effect = lambda **kwargs: driver.abort()
+
+    with pytest.raises(KeyboardInterrupt, match="aborted"):
+        driver.stabilize_at(1.0, 0.25, magnetic_field_ramp_rate=0.1)
+
+    driver.temperature_control.start_proposed_mode.assert_not_called()
+
+
+@pytest.mark.parametrize("during_start", [True, False])
+def test_abort_leaves_the_callers_task_alone(driver, monkeypatch, during_start):
+    monkeypatch.setattr(kiutra_module, "_POLL_MIN", 30)
+    type(driver.magnet_control).stable = PropertyMock(return_value=False)
+    if during_start:
+        driver.magnet_control.start.side_effect = lambda **kwargs: driver.abort()
+
+    async def measure():
+        if not during_start:
+            asyncio.get_running_loop().call_later(0.1, driver.abort)
+        with pytest.raises(asyncio.CancelledError):
+            await driver.stabilize_at_magnetic_field_async(
+                1.0, magnetic_field_ramp_rate=0.1
+            )
+        # recovery code after an abort keeps running
+        await asyncio.sleep(0)
+        return asyncio.current_task().cancelling()
+
+    assert asyncio.run(measure()) == 0
+    driver.magnet_control.stop.assert_called()
+
+
+def test_abort_stops_temperature_even_if_magnet_stop_fails(driver):
+    driver.magnet_control.stop.side_effect = ConnectionError("lost")
+
+    with pytest.raises(ConnectionError, match="lost"):
+        driver.abort()
+
+    driver.temperature_control.stop.assert_called_once()
+
+
+def test_abort_does_not_affect_the_next_wait(driver):
+    driver.abort()
+    _set_stable(driver.magnet_control, False, True)
+
+    driver.stabilize_at_magnetic_field(1.0, magnetic_field_ramp_rate=0.1)
+
+
+def test_stabilize_skips_ramp_when_already_at_setpoint(driver):
+    driver._field_tolerance = driver._temp_tolerance = 1e-3
+    driver.magnet_control.field = 1.0
+    driver.temperature_control.kelvin = 0.25
+    _set_stable(driver.magnet_control, True, True)
+    _set_stable(driver.temperature_control, True, True)
+
+    driver.stabilize_at_magnetic_field(1.0)
+    driver.stabilize_at_temperature(0.25)
+
+    driver.magnet_control.start.assert_not_called()
+    driver.temperature_control.start_proposed_mode.assert_not_called()
+
+
+def test_stabilize_at_only_ramps_what_is_off_setpoint(driver):
+    driver._field_tolerance = driver._temp_tolerance = 1e-3
+    driver.magnet_control.field = 1.0
+    driver.temperature_control.kelvin = 0.2
+    _set_stable(driver.magnet_control, True)
+    _set_stable(driver.temperature_control, False, True)
+
+    driver.stabilize_at(1.0, 0.25)
+
+    driver.magnet_control.start.assert_not_called()
+    driver.temperature_control.start_proposed_mode.assert_called_once()
+
+
+def test_steps_finer_than_a_tolerance_are_ramped_by_default(driver):
+    driver.magnet_control.field = 0.0
+    driver.temperature_control.kelvin = 0.2
+    _set_stable(driver.magnet_control, True)
+    _set_stable(driver.temperature_control, True)
+
+    driver.sample_magnetic_field(0.0005)
+    driver.stabilize_at_temperature(0.2005)
+
+    driver.magnet_control.start.assert_called_once_with(setpoint=0.0005, ramp=0.1)
+    driver.temperature_control.start_proposed_mode.assert_called_once()
+
+
+def test_controllers_address_their_devices(driver):
+    assert driver.cryostat_control.device == "cryostat"
+    assert driver.sample_control.device == "sample_loader"
+    assert driver.adr_control.device == "adr_control"
+    assert driver.adr_control.host == "127.0.0.1"